@@ -79,6 +79,26 @@ app.add_middleware(
     allow_credentials=False,  # usamos Bearer/headers, no cookies
 )
 
+# Routers SQLAlchemy (se importan aquí, después de preparar el entorno de PostgreSQL).
+# db.py usa DATABASE_URL: se arma con los mismos PG* de get_conn() para que todo
+# el proceso hable con la misma base. /tarjetas exige el token que entrega /auth.
+from sqlalchemy.engine import URL
+
+os.environ["DATABASE_URL"] = URL.create(
+    "postgresql+psycopg2",
+    username=os.getenv("PGUSER", DEFAULT_USER),
+    password=os.getenv("PGPASSWORD", DEFAULT_PASS),
+    host=os.getenv("PGHOST", DEFAULT_HOST),
+    port=int(os.getenv("PGPORT", DEFAULT_PORT)),
+    database=os.getenv("PGDATABASE", DEFAULT_DBNAME),
+).render_as_string(hide_password=False)
+
+import auth
+import tarjetas
+
+app.include_router(auth.router)
+app.include_router(tarjetas.router)
+
 # -------------------------------------------------------------------
 #  Utils
 # -------------------------------------------------------------------
@@ -186,7 +206,7 @@ def listar_gastos(
 
 @app.get("/")
 def root():
-    return {"name": "Finanzas API", "endpoints": ["/health", "/prestamos", "/gastos"]}
+    return {"name": "Finanzas API", "endpoints": ["/health", "/prestamos", "/gastos", "/tarjetas"]}
 
 # Manejo amable de preflight (CORS)
 @app.options("/{full_path:path}")
@@ -0,0 +1,14 @@
+# backend/fechas.py
+from calendar import monthrange
+
+def add_months(y: int, m: int, add: int) -> (int, int):
+    """Suma 'add' meses a (y,m) y devuelve (nuevo_anio, nuevo_mes)."""
+    total = (y * 12 + (m - 1)) + add
+    ny = total // 12
+    nm = (total % 12) + 1
+    return ny, nm
+
+def clamp_day(y: int, m: int, d: int) -> int:
+    """Ajusta el día al máximo del mes (28/30/31)."""
+    last = monthrange(y, m)[1]
+    return min(d, last)
@@ -1,6 +1,5 @@
 # backend/prestamos.py
 from datetime import date
-from calendar import monthrange
 from typing import Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -12,22 +11,10 @@ from sqlalchemy import Column, Integer, String, DateTime, func
 
 from auth import get_current_user  # si ya lo tienes
 # Si tu get_current_user está en otro sitio, ajusta el import.
+from fechas import add_months, clamp_day
 
 router = APIRouter(prefix="/prestamos", tags=["Prestamos"])
 
-# --------- Utils ---------
-def add_months(y: int, m: int, add: int) -> (int, int):
-    """Suma 'add' meses a (y,m) y devuelve (nuevo_anio, nuevo_mes)."""
-    total = (y * 12 + (m - 1)) + add
-    ny = total // 12
-    nm = (total % 12) + 1
-    return ny, nm
-
-def clamp_day(y: int, m: int, d: int) -> int:
-    """Ajusta el día al máximo del mes (28/30/31)."""
-    last = monthrange(y, m)[1]
-    return min(d, last)
-
 # --------- SQLAlchemy model ---------
 class Prestamo(Base):
     __tablename__ = "prestamos"
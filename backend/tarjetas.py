@@ -0,0 +1,443 @@
+# backend/tarjetas.py
+from datetime import date
+import logging
+from typing import Optional, List, Dict, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field, ConfigDict
+
+from db import Base, engine, get_db
+from sqlalchemy import (
+    Column, Integer, String, Date, DateTime, ForeignKey, Index, UniqueConstraint, func
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from auth import get_current_user
+from fechas import add_months, clamp_day
+
+router = APIRouter(prefix="/tarjetas", tags=["Tarjetas"])
+
+MAX_CUOTAS = 48
+
+# --------- Utils ---------
+# Un "ciclo" es el mes de facturación codificado como anio*12 + (mes-1):
+# permite filtrar rangos de meses con una sola comparación indexada.
+def to_ciclo(y: int, m: int) -> int:
+    return y * 12 + (m - 1)
+
+def from_ciclo(c: int) -> Tuple[int, int]:
+    """Devuelve (anio, mes) de un ciclo."""
+    return c // 12, (c % 12) + 1
+
+def fecha_cierre(dia_cierre: int, c: int) -> date:
+    y, m = from_ciclo(c)
+    return date(y, m, clamp_day(y, m, dia_cierre))
+
+def fecha_vencimiento(dia_vencimiento: int, c: int) -> date:
+    """El estado de cuenta del ciclo (y,m) vence el mes siguiente."""
+    y, m = add_months(*from_ciclo(c), 1)
+    return date(y, m, clamp_day(y, m, dia_vencimiento))
+
+def ciclo_de_compra(dia_cierre: int, d: date) -> int:
+    """Ciclo en que se factura una compra: el del mes si es antes del cierre, si no el siguiente."""
+    c = to_ciclo(d.year, d.month)
+    return c if d <= fecha_cierre(dia_cierre, c) else c + 1
+
+def ciclo_abierto(dia_cierre: int, hoy: Optional[date] = None) -> int:
+    """Primer ciclo que aún no cierra (todo ciclo anterior es inmutable)."""
+    return ciclo_de_compra(dia_cierre, hoy or date.today())
+
+def monto_cuota(monto_total: int, cuotas: int, n: int) -> int:
+    """Monto de la cuota n (0 = primera). El resto de la división va en la primera."""
+    base = monto_total // cuotas
+    return base + (monto_total - base * cuotas if n == 0 else 0)
+
+# --------- SQLAlchemy models ---------
+class Tarjeta(Base):
+    __tablename__ = "tarjetas"
+
+    id = Column(Integer, primary_key=True, index=True)
+    nombre = Column(String, nullable=False)
+    dia_cierre = Column(Integer, nullable=False)       # 1-31
+    dia_vencimiento = Column(Integer, nullable=False)  # 1-31 (mes siguiente al cierre)
+    cupo = Column(Integer, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+class CompraTarjeta(Base):
+    __tablename__ = "tarjeta_compras"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tarjeta_id = Column(Integer, ForeignKey("tarjetas.id", ondelete="CASCADE"), nullable=False)
+    descripcion = Column(String, nullable=False)
+    monto_total = Column(Integer, nullable=False)
+    cuotas = Column(Integer, nullable=False, default=1)
+    fecha_compra = Column(Date, nullable=False)
+    primer_ciclo = Column(Integer, nullable=False)  # ciclo de la primera cuota
+    ultimo_ciclo = Column(Integer, nullable=False)  # primer_ciclo + cuotas - 1
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_tarjeta_compras_ciclos", "tarjeta_id", "primer_ciclo", "ultimo_ciclo"),
+    )
+
+class FacturaTarjeta(Base):
+    """Snapshot inmutable de un ciclo ya cerrado."""
+    __tablename__ = "tarjeta_facturas"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tarjeta_id = Column(Integer, ForeignKey("tarjetas.id", ondelete="CASCADE"), nullable=False)
+    ciclo = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False)
+    cantidad_cuotas = Column(Integer, nullable=False)
+    fecha_cierre = Column(Date, nullable=False)
+    fecha_vencimiento = Column(Date, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("tarjeta_id", "ciclo", name="uq_tarjeta_facturas_ciclo"),
+    )
+
+def crear_tablas():
+    """Crea solo las tablas de este módulo, al arrancar y no al importar."""
+    try:
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[Tarjeta.__table__, CompraTarjeta.__table__, FacturaTarjeta.__table__],
+        )
+    except Exception:
+        logging.getLogger("uvicorn.error").exception("No pude crear las tablas de tarjetas")
+
+router.on_startup.append(crear_tablas)
+
+# --------- Schemas ---------
+class TarjetaCreate(BaseModel):
+    nombre: str
+    dia_cierre: int = Field(ge=1, le=31)
+    dia_vencimiento: int = Field(ge=1, le=31)
+    cupo: Optional[int] = Field(None, gt=0)
+
+class TarjetaUpdate(BaseModel):
+    # dia_cierre no se edita: movería compras entre ciclos ya cerrados.
+    nombre: Optional[str] = None
+    dia_vencimiento: Optional[int] = Field(None, ge=1, le=31)
+    cupo: Optional[int] = Field(None, gt=0)
+
+class TarjetaOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    nombre: str
+    dia_cierre: int
+    dia_vencimiento: int
+    cupo: Optional[int] = None
+
+class CompraCreate(BaseModel):
+    descripcion: str
+    monto_total: int = Field(gt=0)
+    cuotas: int = Field(default=1, ge=1, le=MAX_CUOTAS)
+    fecha_compra: date
+
+class CompraOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    tarjeta_id: int
+    descripcion: str
+    monto_total: int
+    cuotas: int
+    fecha_compra: date
+
+    # Derivados
+    valor_cuota: int
+    primer_anio: int
+    primer_mes: int
+    cuotas_facturadas: int
+
+class FacturaOut(BaseModel):
+    tarjeta_id: int
+    anio: int
+    mes: int
+    total: int
+    cantidad_cuotas: int
+    fecha_cierre: date
+    fecha_vencimiento: date
+    cerrada: bool   # ya pasó la fecha de cierre
+    guardada: bool  # congelada en tarjeta_facturas (inmutable)
+
+def build_compra_out(c: CompraTarjeta, abierto: int) -> CompraOut:
+    y, m = from_ciclo(c.primer_ciclo)
+    facturadas = min(max(abierto - c.primer_ciclo, 0), c.cuotas)
+    return CompraOut(
+        id=c.id,
+        tarjeta_id=c.tarjeta_id,
+        descripcion=c.descripcion,
+        monto_total=c.monto_total,
+        cuotas=c.cuotas,
+        fecha_compra=c.fecha_compra,
+        valor_cuota=monto_cuota(c.monto_total, c.cuotas, 1 if c.cuotas > 1 else 0),
+        primer_anio=y,
+        primer_mes=m,
+        cuotas_facturadas=facturadas,
+    )
+
+# --------- Motor de facturación ---------
+def ciclo_inicial(t: Tarjeta) -> int:
+    """Primer ciclo que cierra con la tarjeta ya registrada; los anteriores nunca se congelan."""
+    creada = t.created_at.date() if t.created_at else date.today()
+    return ciclo_abierto(t.dia_cierre, creada)
+
+def leer_snapshots(db: Session, tids, desde: int, hasta: int) -> Dict[Tuple[int, int], FacturaTarjeta]:
+    return {
+        (f.tarjeta_id, f.ciclo): f
+        for f in db.query(FacturaTarjeta).filter(
+            FacturaTarjeta.tarjeta_id.in_(tids),
+            FacturaTarjeta.ciclo.between(desde, hasta),
+        )
+    }
+
+def insertar_snapshots(db: Session, filas: List[dict]):
+    """INSERT ... ON CONFLICT DO NOTHING: si otra petición ya congeló el ciclo, gana la suya."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    db.execute(
+        insert(FacturaTarjeta).values(filas).on_conflict_do_nothing(index_elements=["tarjeta_id", "ciclo"])
+    )
+
+def bloquear_tarjetas(db: Session, tids):
+    """Bloquea las filas de las tarjetas (en orden de id) hasta el commit."""
+    db.query(Tarjeta.id).filter(Tarjeta.id.in_(tids)).order_by(Tarjeta.id).with_for_update().all()
+
+def factura_desde_snapshot(f: FacturaTarjeta) -> FacturaOut:
+    y, m = from_ciclo(f.ciclo)
+    return FacturaOut(
+        tarjeta_id=f.tarjeta_id, anio=y, mes=m,
+        total=f.total, cantidad_cuotas=f.cantidad_cuotas,
+        fecha_cierre=f.fecha_cierre, fecha_vencimiento=f.fecha_vencimiento,
+        cerrada=True, guardada=True,
+    )
+
+def calcular_facturas(
+    db: Session, tarjetas: List[Tarjeta], desde: int, hasta: int, hoy: Optional[date] = None
+) -> List[FacturaOut]:
+    """
+    Estados de cuenta de todas las tarjetas para los ciclos [desde, hasta].
+
+    Los ciclos congelados se leen de tarjeta_facturas; el resto se calcula en una
+    sola pasada sobre tarjeta_compras (una consulta por rango de ciclos). Un ciclo
+    se congela la primera vez que se lee después de su cierre, solo si cerró con
+    la tarjeta ya registrada.
+    """
+    if not tarjetas or desde > hasta:
+        return []
+    hoy = hoy or date.today()
+    # Se copian los campos de las tarjetas: el commit del final expira los objetos.
+    datos = {t.id: (t.dia_cierre, t.dia_vencimiento) for t in tarjetas}
+    abiertos = {tid: ciclo_abierto(dc, hoy) for tid, (dc, _) in datos.items()}
+    iniciales = {t.id: ciclo_inicial(t) for t in tarjetas}
+
+    def pendientes_de(snaps):
+        return [(tid, c) for tid in datos for c in range(desde, hasta + 1) if (tid, c) not in snaps]
+
+    def congelable(tid: int, c: int) -> bool:
+        return iniciales[tid] <= c < abiertos[tid]
+
+    snaps = leer_snapshots(db, datos, desde, hasta)
+    pendientes = pendientes_de(snaps)
+    por_congelar = {tid for tid, c in pendientes if congelable(tid, c)}
+    if por_congelar:
+        # Ninguna compra de estas tarjetas entra ni sale mientras se congela el ciclo.
+        bloquear_tarjetas(db, por_congelar)
+        snaps = leer_snapshots(db, datos, desde, hasta)
+        pendientes = pendientes_de(snaps)
+
+    totales: Dict[Tuple[int, int], List[int]] = {k: [0, 0] for k in pendientes}
+    if pendientes:
+        tids = {tid for tid, _ in pendientes}
+        lo = min(c for _, c in pendientes)
+        hi = max(c for _, c in pendientes)
+        compras = db.query(
+            CompraTarjeta.tarjeta_id, CompraTarjeta.monto_total, CompraTarjeta.cuotas,
+            CompraTarjeta.primer_ciclo, CompraTarjeta.ultimo_ciclo,
+        ).filter(
+            CompraTarjeta.tarjeta_id.in_(tids),
+            # Cota inferior: ninguna compra dura más de MAX_CUOTAS ciclos.
+            CompraTarjeta.primer_ciclo.between(lo - (MAX_CUOTAS - 1), hi),
+            CompraTarjeta.ultimo_ciclo >= lo,
+        )
+        for tid, monto, cuotas, primer, ultimo in compras:
+            for c in range(max(primer, lo), min(ultimo, hi) + 1):
+                acc = totales.get((tid, c))
+                if acc is not None:
+                    acc[0] += monto_cuota(monto, cuotas, c - primer)
+                    acc[1] += 1
+
+    out: List[FacturaOut] = []
+    nuevos: List[dict] = []
+    for tid, (dia_cierre, dia_vencimiento) in datos.items():
+        for c in range(desde, hasta + 1):
+            f = snaps.get((tid, c))
+            if f is not None:
+                out.append(factura_desde_snapshot(f))
+                continue
+            y, m = from_ciclo(c)
+            total, n = totales[(tid, c)]
+            fila = dict(
+                tarjeta_id=tid, ciclo=c, total=total, cantidad_cuotas=n,
+                fecha_cierre=fecha_cierre(dia_cierre, c),
+                fecha_vencimiento=fecha_vencimiento(dia_vencimiento, c),
+            )
+            if congelable(tid, c):
+                nuevos.append(fila)
+            out.append(FacturaOut(
+                tarjeta_id=tid, anio=y, mes=m,
+                total=total, cantidad_cuotas=n,
+                fecha_cierre=fila["fecha_cierre"], fecha_vencimiento=fila["fecha_vencimiento"],
+                cerrada=c < abiertos[tid], guardada=False,
+            ))
+
+    if nuevos:
+        insertar_snapshots(db, nuevos)
+        db.commit()
+        # Se informa lo que quedó guardado, sea de esta petición o de otra concurrente.
+        claves = {(r["tarjeta_id"], r["ciclo"]) for r in nuevos}
+        guardadas = leer_snapshots(
+            db, {tid for tid, _ in claves}, min(c for _, c in claves), max(c for _, c in claves)
+        )
+        out = [
+            factura_desde_snapshot(guardadas[k]) if k in claves and k in guardadas else f
+            for f, k in ((f, (f.tarjeta_id, to_ciclo(f.anio, f.mes))) for f in out)
+        ]
+    return out
+
+def verificar_ciclos_abiertos(t: Tarjeta, primer: int, ultimo: int, hoy: Optional[date] = None):
+    """
+    Impide tocar compras de un estado de cuenta cerrado con la tarjeta ya
+    registrada, se haya listado (congelado) o no.
+    """
+    desde = max(primer, ciclo_inicial(t))
+    if desde <= ultimo and desde < ciclo_abierto(t.dia_cierre, hoy):
+        y, m = from_ciclo(desde)
+        raise HTTPException(409, f"El estado de cuenta {m:02d}/{y} ya está cerrado.")
+
+# --------- Endpoints: tarjetas ---------
+@router.get("", response_model=List[TarjetaOut])
+def listar_tarjetas(db: Session = Depends(get_db), _user=Depends(get_current_user)):
+    return db.query(Tarjeta).order_by(Tarjeta.nombre).all()
+
+@router.post("", response_model=TarjetaOut, status_code=201)
+def crear_tarjeta(data: TarjetaCreate, db: Session = Depends(get_db), _user=Depends(get_current_user)):
+    t = Tarjeta(**data.model_dump())
+    db.add(t)
+    db.commit()
+    db.refresh(t)
+    return t
+
+@router.put("/{tid}", response_model=TarjetaOut)
+def actualizar_tarjeta(tid: int, data: TarjetaUpdate, db: Session = Depends(get_db), _user=Depends(get_current_user)):
+    t = db.get(Tarjeta, tid)
+    if not t:
+        raise HTTPException(404, "Tarjeta no encontrada")
+    cambios = data.model_dump(exclude_unset=True)
+    nulos = [k for k in ("nombre", "dia_vencimiento") if k in cambios and cambios[k] is None]
+    if nulos:
+        raise HTTPException(400, f"Estos campos no pueden ser nulos: {', '.join(nulos)}")
+    for k, v in cambios.items():
+        setattr(t, k, v)
+    db.commit()
+    db.refresh(t)
+    return t
+
+@router.delete("/{tid}")
+def eliminar_tarjeta(tid: int, db: Session = Depends(get_db), _user=Depends(get_current_user)):
+    t = db.get(Tarjeta, tid)
+    if not t:
+        raise HTTPException(404, "Tarjeta no encontrada")
+    db.query(FacturaTarjeta).filter(FacturaTarjeta.tarjeta_id == tid).delete(synchronize_session=False)
+    db.query(CompraTarjeta).filter(CompraTarjeta.tarjeta_id == tid).delete(synchronize_session=False)
+    db.delete(t)
+    db.commit()
+    return {"ok": True}
+
+# --------- Endpoints: facturas ---------
+@router.get("/facturas", response_model=dict)
+def listar_facturas(
+    mes: Optional[int] = Query(None, ge=1, le=12),
+    anio: Optional[int] = Query(None, ge=1900, le=2100),
+    meses: int = Query(12, ge=1, le=36),
+    tarjeta_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    _user=Depends(get_current_user)
+):
+    """
+    Estados de cuenta de los 'meses' ciclos que terminan en mes/anio. Por defecto
+    terminan en el ciclo abierto más lejano, para que las compras de hoy aparezcan
+    aunque la tarjeta ya haya cerrado este mes.
+    """
+    hoy = date.today()
+    q = db.query(Tarjeta)
+    if tarjeta_id is not None:
+        q = q.filter(Tarjeta.id == tarjeta_id)
+    tarjetas = q.order_by(Tarjeta.nombre).all()
+
+    if mes or anio or not tarjetas:
+        hasta = to_ciclo(anio or hoy.year, mes or hoy.month)
+    else:
+        hasta = max(ciclo_abierto(t.dia_cierre, hoy) for t in tarjetas)
+    desde = hasta - meses + 1
+
+    items = calcular_facturas(db, tarjetas, desde, hasta, hoy)
+
+    por_mes: Dict[Tuple[int, int], int] = {}
+    for f in items:
+        por_mes[(f.anio, f.mes)] = por_mes.get((f.anio, f.mes), 0) + f.total
+
+    return {
+        "items": items,
+        "resumen": [
+            {"anio": y, "mes": m, "total": total} for (y, m), total in sorted(por_mes.items())
+        ],
+    }
+
+# --------- Endpoints: compras ---------
+@router.get("/{tid}/compras", response_model=List[CompraOut])
+def listar_compras(tid: int, db: Session = Depends(get_db), _user=Depends(get_current_user)):
+    t = db.get(Tarjeta, tid)
+    if not t:
+        raise HTTPException(404, "Tarjeta no encontrada")
+    abierto = ciclo_abierto(t.dia_cierre)
+    compras = (
+        db.query(CompraTarjeta)
+        .filter(CompraTarjeta.tarjeta_id == tid)
+        .order_by(CompraTarjeta.fecha_compra.desc(), CompraTarjeta.id.desc())
+        .all()
+    )
+    return [build_compra_out(c, abierto) for c in compras]
+
+@router.post("/{tid}/compras", response_model=CompraOut, status_code=201)
+def crear_compra(tid: int, data: CompraCreate, db: Session = Depends(get_db), _user=Depends(get_current_user)):
+    # El bloqueo evita que un listado congele el ciclo entre la verificación y el insert.
+    t = db.query(Tarjeta).filter(Tarjeta.id == tid).with_for_update().first()
+    if not t:
+        raise HTTPException(404, "Tarjeta no encontrada")
+    abierto = ciclo_abierto(t.dia_cierre)
+    primer = ciclo_de_compra(t.dia_cierre, data.fecha_compra)
+    ultimo = primer + data.cuotas - 1
+    verificar_ciclos_abiertos(t, primer, ultimo)
+
+    c = CompraTarjeta(tarjeta_id=tid, primer_ciclo=primer, ultimo_ciclo=ultimo, **data.model_dump())
+    db.add(c)
+    db.commit()
+    db.refresh(c)
+    return build_compra_out(c, abierto)
+
+@router.delete("/compras/{cid}")
+def eliminar_compra(cid: int, db: Session = Depends(get_db), _user=Depends(get_current_user)):
+    c = db.get(CompraTarjeta, cid)
+    if not c:
+        raise HTTPException(404, "Compra no encontrada")
+    t = db.query(Tarjeta).filter(Tarjeta.id == c.tarjeta_id).with_for_update().first()
+    verificar_ciclos_abiertos(t, c.primer_ciclo, c.ultimo_ciclo)
+    db.delete(c)
+    db.commit()
+    return {"ok": True}
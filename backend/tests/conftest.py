@@ -0,0 +1,35 @@
+# backend/tests/conftest.py
+import os
+import sys
+import pathlib
+import tempfile
+
+import pytest
+
+# Base SQLite temporal: db.py exige DATABASE_URL antes de importarse.
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+_tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+_tmp.close()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from db import Base, SessionLocal, engine  # noqa: E402
+import tarjetas  # noqa: E402,F401  (registra las tablas)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _borrar_base_temporal():
+    yield
+    engine.dispose()
+    os.remove(_tmp.name)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    s = SessionLocal()
+    try:
+        yield s
+    finally:
+        s.close()
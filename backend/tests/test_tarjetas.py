@@ -0,0 +1,188 @@
+# backend/tests/test_tarjetas.py
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from db import engine
+from tarjetas import (
+    Tarjeta, CompraTarjeta, FacturaTarjeta, CompraCreate, TarjetaUpdate, MAX_CUOTAS,
+    to_ciclo, from_ciclo, ciclo_de_compra, ciclo_abierto, fecha_cierre, fecha_vencimiento,
+    monto_cuota, calcular_facturas, crear_compra, eliminar_compra, actualizar_tarjeta,
+)
+
+HOY = date(2026, 10, 18)
+
+
+def nueva_tarjeta(db, creada, dia_cierre=20, dia_vencimiento=5, nombre="Visa"):
+    t = Tarjeta(nombre=nombre, dia_cierre=dia_cierre, dia_vencimiento=dia_vencimiento, created_at=creada)
+    db.add(t)
+    db.commit()
+    db.refresh(t)
+    return t
+
+
+def agregar_compra(db, t, fecha, monto, cuotas=1):
+    primer = ciclo_de_compra(t.dia_cierre, fecha)
+    db.add(CompraTarjeta(
+        tarjeta_id=t.id, descripcion="compra", monto_total=monto, cuotas=cuotas,
+        fecha_compra=fecha, primer_ciclo=primer, ultimo_ciclo=primer + cuotas - 1,
+    ))
+    db.commit()
+
+
+def por_mes(items, tarjeta_id):
+    return {(f.anio, f.mes): f for f in items if f.tarjeta_id == tarjeta_id}
+
+
+# --------- Ciclos y cuotas ---------
+def test_ciclo_ida_y_vuelta():
+    assert from_ciclo(to_ciclo(2026, 1)) == (2026, 1)
+    assert from_ciclo(to_ciclo(2026, 12) + 1) == (2027, 1)
+
+
+def test_ciclo_de_compra_respeta_dia_de_cierre():
+    assert ciclo_de_compra(20, date(2026, 3, 20)) == to_ciclo(2026, 3)
+    assert ciclo_de_compra(20, date(2026, 3, 21)) == to_ciclo(2026, 4)
+    assert ciclo_de_compra(20, date(2026, 12, 25)) == to_ciclo(2027, 1)
+
+
+def test_cierre_31_en_febrero():
+    assert fecha_cierre(31, to_ciclo(2026, 2)) == date(2026, 2, 28)
+    assert fecha_cierre(31, to_ciclo(2028, 2)) == date(2028, 2, 29)
+    assert ciclo_de_compra(31, date(2026, 2, 28)) == to_ciclo(2026, 2)
+    assert ciclo_de_compra(31, date(2026, 3, 1)) == to_ciclo(2026, 3)
+    assert ciclo_abierto(31, date(2026, 2, 28)) == to_ciclo(2026, 2)
+
+
+def test_vencimiento_en_mes_siguiente():
+    assert fecha_vencimiento(5, to_ciclo(2026, 12)) == date(2027, 1, 5)
+    assert fecha_vencimiento(31, to_ciclo(2026, 1)) == date(2026, 2, 28)
+
+
+def test_resto_de_cuotas_en_la_primera():
+    cuotas = [monto_cuota(1000, 3, n) for n in range(3)]
+    assert cuotas == [334, 333, 333]
+    assert sum(cuotas) == 1000
+    assert monto_cuota(500, 1, 0) == 500
+
+
+# --------- Estados de cuenta ---------
+def test_cuotas_se_reparten_por_ciclo(db):
+    t = nueva_tarjeta(db, datetime(2025, 1, 1))
+    agregar_compra(db, t, date(2026, 3, 25), 1000, cuotas=3)  # primera cuota en abril
+
+    items = por_mes(calcular_facturas(db, [t], to_ciclo(2026, 3), to_ciclo(2026, 7), HOY), t.id)
+    assert [items[(2026, m)].total for m in range(3, 8)] == [0, 334, 333, 333, 0]
+    assert items[(2026, 4)].cantidad_cuotas == 1
+
+
+def test_tarjeta_nueva_no_congela_ciclos_previos(db):
+    t = nueva_tarjeta(db, datetime(2026, 10, 18))
+
+    items = calcular_facturas(db, [t], to_ciclo(2025, 11), to_ciclo(2026, 10), HOY)
+    assert db.query(FacturaTarjeta).count() == 0
+    assert not any(f.guardada for f in items)
+    assert all(f.cerrada for f in items if (f.anio, f.mes) < (2026, 10))
+
+    # Se pueden cargar compras anteriores al registro de la tarjeta.
+    c = crear_compra(t.id, CompraCreate(
+        descripcion="tv", monto_total=900, cuotas=3, fecha_compra=date(2026, 7, 1),
+    ), db=db, _user=None)
+    items = por_mes(calcular_facturas(db, [t], to_ciclo(2026, 7), to_ciclo(2026, 9), HOY), t.id)
+    assert [items[(2026, m)].total for m in (7, 8, 9)] == [300, 300, 300]
+    eliminar_compra(c.id, db=db, _user=None)
+
+
+def test_ciclos_cerrados_se_congelan(db):
+    t = nueva_tarjeta(db, datetime(2025, 1, 1))
+    agregar_compra(db, t, date(2026, 9, 1), 500)
+    agregar_compra(db, t, date(2026, 10, 2), 200)
+
+    items = por_mes(calcular_facturas(db, [t], to_ciclo(2026, 8), to_ciclo(2026, 11), HOY), t.id)
+    assert items[(2026, 9)].guardada and items[(2026, 9)].total == 500
+    assert not items[(2026, 10)].cerrada and not items[(2026, 10)].guardada
+    assert items[(2026, 10)].total == 200
+    assert db.query(FacturaTarjeta).count() == 2  # agosto y septiembre
+
+    # Una fila que entra por fuera no altera el snapshot.
+    agregar_compra(db, t, date(2026, 9, 2), 999)
+    items = por_mes(calcular_facturas(db, [t], to_ciclo(2026, 8), to_ciclo(2026, 11), HOY), t.id)
+    assert items[(2026, 9)].total == 500
+
+    with pytest.raises(HTTPException) as exc:
+        crear_compra(t.id, CompraCreate(
+            descripcion="tarde", monto_total=100, fecha_compra=date(2026, 9, 5),
+        ), db=db, _user=None)
+    assert exc.value.status_code == 409
+
+
+def test_ciclo_cerrado_sin_listar_es_inmutable(db):
+    t = nueva_tarjeta(db, datetime(2024, 1, 1))
+    agregar_compra(db, t, date(2025, 6, 5), 400)
+    compra = db.query(CompraTarjeta).one()
+
+    with pytest.raises(HTTPException) as exc:
+        crear_compra(t.id, CompraCreate(
+            descripcion="tarde", monto_total=100, fecha_compra=date(2025, 6, 5),
+        ), db=db, _user=None)
+    assert exc.value.status_code == 409
+
+    with pytest.raises(HTTPException) as exc:
+        eliminar_compra(compra.id, db=db, _user=None)
+    assert exc.value.status_code == 409
+    assert db.query(FacturaTarjeta).count() == 0
+
+
+def test_compra_de_maximo_de_cuotas_entra_en_su_ultimo_ciclo(db):
+    t = nueva_tarjeta(db, datetime(2022, 1, 1))
+    agregar_compra(db, t, date(2023, 1, 10), 100 * MAX_CUOTAS, cuotas=MAX_CUOTAS)
+    ultimo = to_ciclo(2023, 1) + MAX_CUOTAS - 1
+
+    items = calcular_facturas(db, [t], ultimo, ultimo + 1, HOY)
+    assert [f.total for f in items] == [100, 0]
+
+
+def test_actualizar_tarjeta_rechaza_nulos(db):
+    t = nueva_tarjeta(db, datetime(2025, 1, 1))
+    with pytest.raises(HTTPException) as exc:
+        actualizar_tarjeta(t.id, TarjetaUpdate(nombre=None), db=db, _user=None)
+    assert exc.value.status_code == 400
+
+    db.rollback()
+    assert actualizar_tarjeta(t.id, TarjetaUpdate(cupo=None), db=db, _user=None).nombre == "Visa"
+
+
+def test_ciclo_abierto_se_recalcula(db):
+    t = nueva_tarjeta(db, datetime(2025, 1, 1))
+    antes = por_mes(calcular_facturas(db, [t], to_ciclo(2026, 10), to_ciclo(2026, 10), HOY), t.id)
+    agregar_compra(db, t, date(2026, 10, 5), 300)
+    despues = por_mes(calcular_facturas(db, [t], to_ciclo(2026, 10), to_ciclo(2026, 10), HOY), t.id)
+    assert antes[(2026, 10)].total == 0
+    assert despues[(2026, 10)].total == 300
+
+
+def test_consultas_no_dependen_de_cantidad_de_tarjetas(db):
+    def contar(n):
+        tarjetas = [nueva_tarjeta(db, datetime(2025, 1, 1), nombre=f"T{i}") for i in range(n)]
+        for t in tarjetas:
+            agregar_compra(db, t, date(2026, 2, 10), 1200, cuotas=12)
+        # Como en listar_facturas: las tarjetas se leen frescas en la misma petición.
+        tarjetas = db.query(Tarjeta).filter(Tarjeta.id.in_([t.id for t in tarjetas])).all()
+        consultas = []
+        escuchar = lambda *args: consultas.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", escuchar)
+        try:
+            items = calcular_facturas(db, tarjetas, to_ciclo(2025, 11), to_ciclo(2026, 10), HOY)
+        finally:
+            event.remove(engine, "before_cursor_execute", escuchar)
+        assert len(items) == 12 * n
+        assert all(f.total == 100 and f.cantidad_cuotas == 1 for f in items if (f.anio, f.mes) >= (2026, 2))
+        return len(consultas)
+
+    uno = contar(1)
+    db.query(FacturaTarjeta).delete()
+    db.commit()
+    assert contar(8) == uno
+    assert uno <= 6
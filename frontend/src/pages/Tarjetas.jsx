@@ -1,109 +1,243 @@
 // frontend/src/pages/Tarjetas.jsx
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import AppShell, { ui } from "../components/AppShell";
+import api from "../api/api";
+
+const fmtCLP = new Intl.NumberFormat("es-CL", {
+  style: "currency",
+  currency: "CLP",
+  maximumFractionDigits: 0,
+});
+const fmtFecha = (iso) =>
+  iso ? new Date(iso + "T00:00:00").toLocaleDateString("es-CL", { day: "2-digit", month: "short", year: "numeric" }) : "-";
+
+const MESES_CORTOS = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"];
+
+// Etiqueta arriba del input
+function Labeled({ label, children }) {
+  return (
+    <label style={styles.labeled}>
+      <div style={styles.labelText}>{label}</div>
+      {children}
+    </label>
+  );
+}
+
+const hoyISO = () => new Date().toISOString().slice(0, 10);
 
 export default function Tarjetas() {
-  const [form, setForm] = useState({ banco: "", mes: "", anio: "", total: "" });
-  const [items, setItems] = useState([]);
+  // Tarjetas + facturas (12 ciclos hasta el abierto más lejano, todas las tarjetas en una sola llamada)
+  const [tarjetas, setTarjetas] = useState([]);
+  const [facturas, setFacturas] = useState([]);
+  const [resumen, setResumen] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [err, setErr] = useState("");
 
-  const fmt = new Intl.NumberFormat("es-CL", {
-    style: "currency",
-    currency: "CLP",
-    maximumFractionDigits: 0,
-  });
+  // Compras de la tarjeta seleccionada
+  const [selId, setSelId] = useState("");
+  const [compras, setCompras] = useState([]);
 
-  const add = (e) => {
+  // Forms
+  const [formTarjeta, setFormTarjeta] = useState({ nombre: "", dia_cierre: "20", dia_vencimiento: "5", cupo: "" });
+  const [formCompra, setFormCompra] = useState({ descripcion: "", monto_total: "", cuotas: "1", fecha_compra: hoyISO() });
+  const [busy, setBusy] = useState(false);
+
+  const load = async () => {
+    try {
+      setErr("");
+      setLoading(true);
+      const [t, f] = await Promise.all([
+        api.get("/tarjetas"),
+        api.get("/tarjetas/facturas", { params: { meses: 12 } }),
+      ]);
+      setTarjetas(t.data || []);
+      setFacturas(f.data.items || []);
+      setResumen(f.data.resumen || []);
+    } catch (e) {
+      setErr(e?.response?.data?.detail || "No pude cargar las tarjetas");
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const loadCompras = async (id = selId) => {
+    if (!id) {
+      setCompras([]);
+      return;
+    }
+    try {
+      const { data } = await api.get(`/tarjetas/${id}/compras`);
+      setCompras(data || []);
+    } catch (e) {
+      alert(e?.response?.data?.detail || "No pude cargar las compras");
+    }
+  };
+
+  useEffect(() => {
+    load();
+  }, []);
+
+  useEffect(() => {
+    loadCompras(selId);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [selId]);
+
+  const crearTarjeta = async (e) => {
     e.preventDefault();
-    if (!form.banco || !form.total) return;
-    setItems((prev) => [...prev, { id: Date.now(), ...form }]);
-    setForm({ banco: "", mes: "", anio: "", total: "" });
+    if (!formTarjeta.nombre || !formTarjeta.dia_cierre || !formTarjeta.dia_vencimiento) return;
+    setBusy(true);
+    try {
+      await api.post("/tarjetas", {
+        nombre: formTarjeta.nombre,
+        dia_cierre: Number(formTarjeta.dia_cierre),
+        dia_vencimiento: Number(formTarjeta.dia_vencimiento),
+        cupo: formTarjeta.cupo ? Number(formTarjeta.cupo) : null,
+      });
+      setFormTarjeta({ nombre: "", dia_cierre: "20", dia_vencimiento: "5", cupo: "" });
+      await load();
+    } catch (e) {
+      alert(e?.response?.data?.detail || "No pude guardar la tarjeta");
+    } finally {
+      setBusy(false);
+    }
   };
 
-  const del = (id) => setItems((prev) => prev.filter((x) => x.id !== id));
+  const eliminarTarjeta = async (id) => {
+    if (!confirm("¿Eliminar esta tarjeta con todas sus compras y facturas?")) return;
+    try {
+      await api.delete(`/tarjetas/${id}`);
+      if (String(id) === String(selId)) setSelId("");
+      await load();
+    } catch (e) {
+      alert(e?.response?.data?.detail || "No pude eliminar");
+    }
+  };
+
+  const crearCompra = async (e) => {
+    e.preventDefault();
+    if (!selId || !formCompra.descripcion || !formCompra.monto_total || !formCompra.fecha_compra) return;
+    setBusy(true);
+    try {
+      await api.post(`/tarjetas/${selId}/compras`, {
+        descripcion: formCompra.descripcion,
+        monto_total: Number(formCompra.monto_total),
+        cuotas: Number(formCompra.cuotas || 1),
+        fecha_compra: formCompra.fecha_compra,
+      });
+      setFormCompra({ descripcion: "", monto_total: "", cuotas: "1", fecha_compra: hoyISO() });
+      await Promise.all([load(), loadCompras()]);
+    } catch (e) {
+      alert(e?.response?.data?.detail || "No pude guardar la compra");
+    } finally {
+      setBusy(false);
+    }
+  };
+
+  const eliminarCompra = async (id) => {
+    if (!confirm("¿Eliminar esta compra?")) return;
+    try {
+      await api.delete(`/tarjetas/compras/${id}`);
+      await Promise.all([load(), loadCompras()]);
+    } catch (e) {
+      alert(e?.response?.data?.detail || "No pude eliminar");
+    }
+  };
+
+  // Índice tarjeta -> "anio-mes" -> factura para armar la grilla
+  const grilla = {};
+  for (const f of facturas) {
+    (grilla[f.tarjeta_id] ||= {})[`${f.anio}-${f.mes}`] = f;
+  }
+
+  // Por tarjeta: estado abierto = primer ciclo sin cerrar; último cerrado = el anterior
+  const abiertas = {};
+  const cerradas = {};
+  for (const f of facturas) {
+    if (!f.cerrada && !abiertas[f.tarjeta_id]) abiertas[f.tarjeta_id] = f;
+    if (f.cerrada) cerradas[f.tarjeta_id] = f;
+  }
+  const sumar = (obj) => Object.values(obj).reduce((s, f) => s + (f.total || 0), 0);
+
+  const actions = facturas.length > 0 ? (
+    <div style={{ display: "flex", gap: 10, alignItems: "center", flexWrap: "wrap" }}>
+      <span style={ui.badge}>Último facturado: <b>{fmtCLP.format(sumar(cerradas))}</b></span>
+      <span style={ui.badge}>Abierto (por facturar): <b>{fmtCLP.format(sumar(abiertas))}</b></span>
+    </div>
+  ) : null;
 
   return (
-    <AppShell
-      title="Facturación tarjetas"
-      actions={
-        items.length > 0 ? (
-          <button
-            onClick={() => setItems([])}
-            style={{ ...ui.btn, background: "#8899aa" }}
-            title="Limpiar listado (UI)"
-          >
-            Limpiar
-          </button>
-        ) : null
-      }
-    >
-      {/* Formulario (UI) */}
-      <div style={ui.card}>
-        <div style={styles.cardTitle}>🧾 Facturación de tarjetas (UI)</div>
-        <form onSubmit={add} style={styles.grid}>
-          <input
-            placeholder="Banco / Tarjeta"
-            value={form.banco}
-            onChange={(e) => setForm({ ...form, banco: e.target.value })}
-            style={styles.input}
-          />
-          <input
-            type="number"
-            placeholder="Mes (1-12)"
-            value={form.mes}
-            onChange={(e) => setForm({ ...form, mes: e.target.value })}
-            style={styles.input}
-          />
-          <input
-            type="number"
-            placeholder="Año"
-            value={form.anio}
-            onChange={(e) => setForm({ ...form, anio: e.target.value })}
-            style={styles.input}
-          />
-          <input
-            type="number"
-            placeholder="Total facturado"
-            value={form.total}
-            onChange={(e) => setForm({ ...form, total: e.target.value })}
-            style={styles.input}
-          />
-          <button type="submit" style={ui.btn}>Guardar</button>
+    <AppShell title="Facturación tarjetas" actions={actions}>
+      {/* Tarjetas */}
+      <section style={ui.card}>
+        <div style={styles.cardTitle}>💳 Tarjetas</div>
+        <form onSubmit={crearTarjeta} style={styles.grid}>
+          <Labeled label="Banco / Tarjeta">
+            <input
+              value={formTarjeta.nombre}
+              onChange={(e) => setFormTarjeta({ ...formTarjeta, nombre: e.target.value })}
+              style={styles.input}
+            />
+          </Labeled>
+          <Labeled label="Día de cierre (1–31)">
+            <input
+              type="number"
+              min={1}
+              max={31}
+              value={formTarjeta.dia_cierre}
+              onChange={(e) => setFormTarjeta({ ...formTarjeta, dia_cierre: e.target.value })}
+              style={styles.input}
+            />
+          </Labeled>
+          <Labeled label="Día de pago (mes siguiente)">
+            <input
+              type="number"
+              min={1}
+              max={31}
+              value={formTarjeta.dia_vencimiento}
+              onChange={(e) => setFormTarjeta({ ...formTarjeta, dia_vencimiento: e.target.value })}
+              style={styles.input}
+            />
+          </Labeled>
+          <Labeled label="Cupo (opcional)">
+            <input
+              type="number"
+              value={formTarjeta.cupo}
+              onChange={(e) => setFormTarjeta({ ...formTarjeta, cupo: e.target.value })}
+              style={styles.input}
+            />
+          </Labeled>
+          <button type="submit" disabled={busy} style={ui.btn}>Guardar</button>
         </form>
-      </div>
-
-      {/* Tabla (UI) */}
-      <div style={ui.card}>
-        <div style={styles.cardTitle}>📄 Facturas</div>
-        {items.length === 0 ? (
-          <div style={{ opacity: 0.8 }}>No hay facturas todavía.</div>
-        ) : (
-          <div style={{ overflowX: "auto" }}>
+
+        {tarjetas.length > 0 && (
+          <div style={{ overflowX: "auto", marginTop: 12 }}>
             <table style={styles.table}>
               <thead>
                 <tr>
-                  <th style={styles.th}>ID</th>
                   <th style={styles.th}>Tarjeta</th>
-                  <th style={styles.th}>Mes</th>
-                  <th style={styles.th}>Año</th>
-                  <th style={styles.th}>Total</th>
+                  <th style={styles.th}>Cierre</th>
+                  <th style={styles.th}>Pago</th>
+                  <th style={styles.th}>Cupo</th>
                   <th style={styles.th}>Acciones</th>
                 </tr>
               </thead>
               <tbody>
-                {items.map((it) => (
-                  <tr key={it.id}>
-                    <td style={styles.td}>{it.id}</td>
-                    <td style={styles.td}>{it.banco}</td>
-                    <td style={styles.td}>{it.mes || "-"}</td>
-                    <td style={styles.td}>{it.anio || "-"}</td>
-                    <td style={styles.td}>{fmt.format(Number(it.total || 0))}</td>
+                {tarjetas.map((t) => (
+                  <tr key={t.id}>
+                    <td style={styles.td}>{t.nombre}</td>
+                    <td style={styles.td}>Día {t.dia_cierre}</td>
+                    <td style={styles.td}>Día {t.dia_vencimiento}</td>
+                    <td style={styles.td}>{t.cupo ? fmtCLP.format(t.cupo) : "-"}</td>
                     <td style={styles.td}>
-                      <button
-                        onClick={() => del(it.id)}
-                        style={{ ...styles.smallBtn, background: "#ff3b30", color: "#fff" }}
-                      >
-                        Eliminar
-                      </button>
+                      <div style={{ display: "flex", gap: 8 }}>
+                        <button onClick={() => setSelId(String(t.id))} style={styles.smallBtn}>Compras</button>
+                        <button
+                          onClick={() => eliminarTarjeta(t.id)}
+                          style={{ ...styles.smallBtn, background: "#ff3b30", color: "#fff" }}
+                        >
+                          Eliminar
+                        </button>
+                      </div>
                     </td>
                   </tr>
                 ))}
@@ -111,13 +245,162 @@ export default function Tarjetas() {
             </table>
           </div>
         )}
-      </div>
+      </section>
+
+      {/* Facturas: últimos 12 ciclos por tarjeta */}
+      <section style={ui.card}>
+        <div style={styles.cardTitle}>📄 Facturas (últimos 12 ciclos)</div>
+        {loading && <div>Cargando…</div>}
+        {err && <div style={styles.error}>{err}</div>}
+        {!loading && !err && (
+          tarjetas.length === 0 ? (
+            <div style={{ opacity: 0.8 }}>No hay tarjetas todavía.</div>
+          ) : (
+            <div style={{ overflowX: "auto" }}>
+              <table style={styles.table}>
+                <thead>
+                  <tr>
+                    <th style={styles.th}>Tarjeta</th>
+                    {resumen.map((r) => (
+                      <th key={`${r.anio}-${r.mes}`} style={styles.th}>
+                        {MESES_CORTOS[r.mes - 1]} {String(r.anio).slice(2)}
+                      </th>
+                    ))}
+                  </tr>
+                </thead>
+                <tbody>
+                  {tarjetas.map((t) => (
+                    <tr key={t.id}>
+                      <td style={styles.td}>{t.nombre}</td>
+                      {resumen.map((r) => {
+                        const f = grilla[t.id]?.[`${r.anio}-${r.mes}`];
+                        const esAbierta = f && abiertas[t.id] === f;
+                        return (
+                          <td
+                            key={`${r.anio}-${r.mes}`}
+                            style={{ ...styles.td, opacity: f?.cerrada || esAbierta ? 1 : 0.7 }}
+                            title={f ? `Cierre ${fmtFecha(f.fecha_cierre)} · Vence ${fmtFecha(f.fecha_vencimiento)}${esAbierta ? " (abierta)" : f.cerrada ? "" : " (próxima)"}` : ""}
+                          >
+                            {f && f.total ? fmtCLP.format(f.total) : "-"}
+                            {esAbierta && <div style={styles.abierta}>abierta</div>}
+                          </td>
+                        );
+                      })}
+                    </tr>
+                  ))}
+                  <tr>
+                    <td style={{ ...styles.td, fontWeight: 700 }}>Total</td>
+                    {resumen.map((r) => (
+                      <td key={`${r.anio}-${r.mes}`} style={{ ...styles.td, fontWeight: 700 }}>
+                        {r.total ? fmtCLP.format(r.total) : "-"}
+                      </td>
+                    ))}
+                  </tr>
+                </tbody>
+              </table>
+            </div>
+          )
+        )}
+      </section>
+
+      {/* Compras de la tarjeta seleccionada */}
+      <section style={ui.card}>
+        <div style={styles.cardTitle}>🛒 Compras</div>
+        <form onSubmit={crearCompra} style={styles.grid}>
+          <Labeled label="Tarjeta">
+            <select value={selId} onChange={(e) => setSelId(e.target.value)} style={styles.input}>
+              <option value="">Selecciona…</option>
+              {tarjetas.map((t) => (
+                <option key={t.id} value={t.id}>{t.nombre}</option>
+              ))}
+            </select>
+          </Labeled>
+          <Labeled label="Descripción">
+            <input
+              value={formCompra.descripcion}
+              onChange={(e) => setFormCompra({ ...formCompra, descripcion: e.target.value })}
+              style={styles.input}
+            />
+          </Labeled>
+          <Labeled label="Monto total">
+            <input
+              type="number"
+              value={formCompra.monto_total}
+              onChange={(e) => setFormCompra({ ...formCompra, monto_total: e.target.value })}
+              style={styles.input}
+            />
+          </Labeled>
+          <Labeled label="Cuotas">
+            <input
+              type="number"
+              min={1}
+              max={48}
+              value={formCompra.cuotas}
+              onChange={(e) => setFormCompra({ ...formCompra, cuotas: e.target.value })}
+              style={styles.input}
+            />
+          </Labeled>
+          <Labeled label="Fecha de compra">
+            <input
+              type="date"
+              value={formCompra.fecha_compra}
+              onChange={(e) => setFormCompra({ ...formCompra, fecha_compra: e.target.value })}
+              style={styles.input}
+            />
+          </Labeled>
+          <button type="submit" disabled={busy || !selId} style={ui.btn}>Agregar</button>
+        </form>
+
+        {selId && (
+          compras.length === 0 ? (
+            <div style={{ opacity: 0.8, marginTop: 12 }}>Sin compras en esta tarjeta.</div>
+          ) : (
+            <div style={{ overflowX: "auto", marginTop: 12 }}>
+              <table style={styles.table}>
+                <thead>
+                  <tr>
+                    <th style={styles.th}>Fecha</th>
+                    <th style={styles.th}>Descripción</th>
+                    <th style={styles.th}>Total</th>
+                    <th style={styles.th}>Cuota</th>
+                    <th style={styles.th}>Facturadas / Cuotas</th>
+                    <th style={styles.th}>Primera factura</th>
+                    <th style={styles.th}>Acciones</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {compras.map((c) => (
+                    <tr key={c.id}>
+                      <td style={styles.td}>{fmtFecha(c.fecha_compra)}</td>
+                      <td style={styles.td}>{c.descripcion}</td>
+                      <td style={styles.td}>{fmtCLP.format(c.monto_total)}</td>
+                      <td style={styles.td}>{fmtCLP.format(c.valor_cuota)}</td>
+                      <td style={styles.td}>{c.cuotas_facturadas} / {c.cuotas}</td>
+                      <td style={styles.td}>{MESES_CORTOS[c.primer_mes - 1]} {c.primer_anio}</td>
+                      <td style={styles.td}>
+                        <button
+                          onClick={() => eliminarCompra(c.id)}
+                          style={{ ...styles.smallBtn, background: "#ff3b30", color: "#fff" }}
+                        >
+                          Eliminar
+                        </button>
+                      </td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          )
+        )}
+      </section>
     </AppShell>
   );
 }
 
 const styles = {
   cardTitle: { fontWeight: 700, marginBottom: 12 },
+  labeled: { display: "flex", flexDirection: "column", gap: 6 },
+  labelText: { fontSize: 12, color: "#8ea3c0", paddingLeft: 2 },
   input: {
     padding: "8px 10px",
     borderRadius: 8,
@@ -127,9 +410,9 @@ const styles = {
   },
   grid: {
     display: "grid",
-    gridTemplateColumns: "repeat(5, minmax(0,1fr))",
+    gridTemplateColumns: "repeat(auto-fit, minmax(160px, 1fr))",
     gap: 10,
-    alignItems: "center",
+    alignItems: "end",
   },
   table: { width: "100%", borderCollapse: "collapse" },
   th: {
@@ -138,7 +421,7 @@ const styles = {
     borderBottom: "1px solid #1f2a44",
     whiteSpace: "nowrap",
   },
-  td: { padding: "8px", borderBottom: "1px solid #1f2a44" },
+  td: { padding: "8px", borderBottom: "1px solid #1f2a44", whiteSpace: "nowrap" },
   smallBtn: {
     padding: "6px 10px",
     border: 0,
@@ -148,4 +431,6 @@ const styles = {
     fontWeight: 700,
     cursor: "pointer",
   },
+  abierta: { fontSize: 11, color: "#ffd166" },
+  error: { background: "#ff3b30", color: "#fff", padding: "8px 10px", borderRadius: 8 },
 };